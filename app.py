@@ -1,58 +1,164 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import pandas as pd
-import numpy as np
-from sklearn.linear_model import LogisticRegression
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.ensemble import RandomForestClassifier
-from scipy.stats import chi2_contingency
-from itertools import combinations, product
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import closing
+from io import BytesIO
+import pyarrow as pa
+from pyarrow import csv as pa_csv
+import hashlib
 import logging
+import multiprocessing
+import os
+import sqlite3
 import threading
 import uuid
 import time
 
+import orjson
+
+from pipeline import (
+    preprocess_dataframe,
+    compute_average_cramers_v,
+    feature_groups,
+    model_targets,
+    ordinal_targets,
+    logistic_regression_analysis,
+    decision_tree_analysis,
+    random_forest_analysis,
+    chi_square_tests,
+    multi_variable_analysis
+)
+from pair_analysis import process_batches_with_eta
+
 app = Flask(__name__)
 CORS(app)
 
 logging.basicConfig(level=logging.INFO)
 
-progress_store = {}
-progress_store_lock = threading.Lock()
-
-def interpret_cramers_v(v):
-    if v < 0.1:
-        return "Very weak"
-    elif v < 0.3:
-        return "Weak"
-    elif v < 0.5:
-        return "Moderate"
-    elif v < 0.7:
-        return "Strong"
-    else:
-        return "Very strong"
-
-def interpret_model_accuracy(accuracy):
-    if accuracy < 0.6:
-        return "Poor"
-    elif accuracy < 0.7:
-        return "Fair"
-    elif accuracy < 0.8:
-        return "Good"
-    elif accuracy < 0.9:
-        return "Very good"
-    else:
-        return "Excellent"
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+MAX_IN_FLIGHT_TASKS = 2 * MAX_WORKERS
+# The pool is the only process-level parallelism: a task's analyses run in
+# its worker, and only the random forests add threads, up to the worker's
+# share of the cores
+WORKER_N_JOBS = max(1, (os.cpu_count() or 1) // MAX_WORKERS)
+TASK_DB_PATH = os.environ.get("TASK_DB_PATH", "tasks.db")
+# Finished tasks keep their full results, so rows are dropped after a day
+TASK_TTL_SECONDS = 24 * 60 * 60
+RESULT_CACHE_MAX_BYTES = 1 << 30
+# Bump whenever the analysis output changes, so stale results stop matching
+RESULT_CACHE_VERSION = 1
+RESULT_SECTIONS = (
+    "logistic_regression_results",
+    "decision_tree_results",
+    "random_forest_results",
+    "chi_square_results",
+    "multi_variable_results"
+)
+
+# Created on first use so that worker processes don't start their own
+executor = None
+executor_lock = threading.Lock()
+# Running futures, mapped to their task ID and the pool they were submitted to
+in_flight_tasks = {}
+
+def get_executor():
+    # Callers hold executor_lock
+    global executor
+    if executor is None:
+        # Workers start from a clean forkserver process, forking the threaded
+        # server process itself could copy locks held by other threads
+        executor = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context("forkserver"))
+    return executor
+
+def connect_task_db():
+    # Task state lives in SQLite so every process (pool workers and server
+    # workers alike) sees the same tasks
+    conn = sqlite3.connect(TASK_DB_PATH, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS tasks (id TEXT PRIMARY KEY, state TEXT, updated_at REAL)")
+    conn.execute("CREATE INDEX IF NOT EXISTS tasks_updated_at ON tasks (updated_at)")
+    conn.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT, size INTEGER, accessed_at REAL)")
+    return conn
+
+def dump_json(obj):
+    # orjson writes bytes directly and handles the numpy scalars in the results
+    return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+
+def save_task(task_id, state, conn=None):
+    if conn is None:
+        with closing(connect_task_db()) as conn:
+            return save_task(task_id, state, conn)
+    conn.execute(
+        "INSERT OR REPLACE INTO tasks (id, state, updated_at) VALUES (?, ?, ?)",
+        # Decoded so SQLite stores TEXT, its JSON functions read BLOBs as JSONB
+        (task_id, dump_json(state).decode(), time.time())
+    )
+
+def load_task(task_id, conn=None):
+    if conn is None:
+        with closing(connect_task_db()) as conn:
+            return load_task(task_id, conn)
+    row = conn.execute("SELECT state FROM tasks WHERE id = ?", (task_id,)).fetchone()
+    return orjson.loads(row[0]) if row else None
+
+def expire_tasks(conn):
+    conn.execute("DELETE FROM tasks WHERE updated_at < ?", (time.time() - TASK_TTL_SECONDS,))
+
+def delete_task(task_id):
+    with closing(connect_task_db()) as conn:
+        conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+
+def result_cache_key(data, selected_columns, max_order):
+    payload = orjson.dumps([RESULT_CACHE_VERSION, data, selected_columns, max_order], option=orjson.OPT_SORT_KEYS, default=str)
+    return hashlib.blake2b(payload, digest_size=32).hexdigest()
+
+def load_cached_result(key):
+    with closing(connect_task_db()) as conn:
+        row = conn.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (time.time(), key))
+    return orjson.loads(row[0])
+
+def save_cached_result(key, result):
+    value = dump_json(result)
+    with closing(connect_task_db()) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(
+            "INSERT OR REPLACE INTO results (key, value, size, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, value.decode(), len(value), time.time())
+        )
+        # Evict the least recently used results once over the size cap
+        total_size = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total_size > RESULT_CACHE_MAX_BYTES:
+            for old_key, size in conn.execute("SELECT key, size FROM results WHERE key != ? ORDER BY accessed_at", (key,)).fetchall():
+                conn.execute("DELETE FROM results WHERE key = ?", (old_key,))
+                total_size -= size
+                if total_size <= RESULT_CACHE_MAX_BYTES:
+                    break
+        conn.execute("COMMIT")
 
 @app.route('/process', methods=['POST'])
 def process_csv():
+    mode = request.args.get('mode', 'full')
+    if mode == 'quick':
+        return process_quick()
+    if mode != 'full':
+        return jsonify({"status": "error", "message": f"Unknown mode: {mode}", "steps_completed": []}), 400
+
     try:
         logging.info("Received request for data processing.")
-        content = request.get_json()
+        raw = request.get_data()
+        content = parse_json_body(raw)
+        if not isinstance(content, dict):
+            raise ValueError("No data provided")
         data = content.get('data')
         selected_columns = content.get('selected_columns')
+        max_order = check_max_order(content.get('max_order', 3))
 
-        if not data or not isinstance(data, list) or len(data) == 0:
+        if not data or not isinstance(data, list) or len(data) == 0 or not all(isinstance(row, dict) for row in data):
             raise ValueError("Input data is empty or not properly formatted.")
 
         if not selected_columns or not isinstance(selected_columns, list):
@@ -60,28 +166,221 @@ def process_csv():
 
         logging.info(f"Received selected_columns: {selected_columns}")
 
-        task_id = str(uuid.uuid4())
-        progress_store[task_id] = {
-            "progress": 0,
-            "status": "processing",
-            "steps_completed": [],
-            "eta": None,
-            "start_time": time.time()
-        }
+        missing_cols = missing_columns(data, selected_columns)
+        if missing_cols:
+            raise ValueError(f"Columns not found in data: {missing_cols}")
+
+        cache_key = result_cache_key(hashlib.blake2b(raw).hexdigest(), selected_columns, max_order)
+        return submit_task(records_to_dataframe(data, selected_columns), max_order, cache_key)
+    except Exception as e:
+        logging.error(f"Unhandled error: {str(e)}")
+        return jsonify({"status": "error", "message": str(e), "steps_completed": []}), 400
 
-        thread = threading.Thread(target=process_data_task, args=(content, task_id))
-        thread.start()
+def parse_json_body(raw):
+    # orjson decodes the whole body in one pass, much faster than the
+    # stdlib decoder behind request.get_json()
+    return orjson.loads(raw) if raw else None
+
+def check_max_order(max_order):
+    # Form fields arrive as strings. bool is an int subclass, but true and
+    # false are not orders
+    if isinstance(max_order, str):
+        try:
+            max_order = int(max_order)
+        except ValueError:
+            max_order = None
+    if isinstance(max_order, bool) or not isinstance(max_order, int) or max_order < 2:
+        raise ValueError("max_order must be an integer of at least 2.")
+    return max_order
+
+def missing_columns(records, columns):
+    present = set().union(*records)
+    return [col for col in columns if col not in present]
+
+def records_to_dataframe(records, columns):
+    # Only the selected columns are materialized and type-inferred
+    return pd.DataFrame(records, columns=columns)
+
+def process_quick():
+    # Synchronous pairwise Cramér's V with a detailed breakdown of each pair
+    try:
+        content = parse_json_body(request.get_data())
+        if not content or not isinstance(content, dict):
+            return jsonify({
+                "status": "error",
+                "message": "No data provided"
+            }), 400
+        
+        data = content.get('data', [])
+        selected_columns = content.get('selected_columns', [])
+        
+        if not data:
+            return jsonify({
+                "status": "error",
+                "message": "No data provided in JSON"
+            }), 400
+
+        if not selected_columns or len(selected_columns) < 2:
+            return jsonify({
+                "status": "error",
+                "message": "Please select at least two columns for analysis"
+            }), 400
+
+        logging.info(f"Received data length: {len(data)}")
+        logging.info(f"Selected columns: {selected_columns}")
+        
+        # Verify all selected columns exist in the data
+        missing_cols = missing_columns(data, selected_columns)
+        if missing_cols:
+            return jsonify({
+                "status": "error",
+                "message": f"Columns not found in data: {missing_cols}"
+            }), 400
+            
+        # Create DataFrame with only the requested columns
+        df_selected = records_to_dataframe(data, selected_columns)
+        
+        # Process the data
+        try:
+            results = process_batches_with_eta(df_selected, selected_columns)
+            
+            # Ensure results is not None and has the expected structure
+            if not results:
+                return jsonify({
+                    "status": "error",
+                    "message": "Analysis produced no results"
+                }), 400
+
+            # Validate results structure
+            required_keys = ["average_cramers_v", "valid_pairs", "pairs"]
+            if not all(key in results for key in required_keys):
+                return jsonify({
+                    "status": "error",
+                    "message": "Invalid results structure"
+                }), 400
+
+            return jsonify({
+                "status": "success",
+                "results": results
+            })
+
+        except Exception as e:
+            logging.error(f"Error in processing data: {str(e)}")
+            return jsonify({
+                "status": "error",
+                "message": f"Error processing data: {str(e)}"
+            }), 400
 
-        return jsonify({"status": "processing", "task_id": task_id})
+    except Exception as e:
+        logging.error(f"Error in process_csv: {str(e)}")
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
+
+@app.route('/process_csv', methods=['POST'])
+def process_csv_upload():
+    try:
+        logging.info("Received CSV upload for data processing.")
+        file = request.files.get('file')
+        selected_columns = request.form.getlist('selected_columns')
+        max_order = check_max_order(request.form.get('max_order', 3))
+
+        if file is None:
+            raise ValueError("No CSV file provided.")
+
+        if not selected_columns:
+            raise ValueError("Selected columns are missing or not in the correct format.")
+
+        logging.info(f"Received selected_columns: {selected_columns}")
+
+        # Parse the upload directly with Arrow's multi-threaded CSV reader
+        raw = file.read()
+        table = pa_csv.read_csv(BytesIO(raw), read_options=pa_csv.ReadOptions(use_threads=True))
+        # Dates and times are kept as text, as they arrive in JSON requests,
+        # so reduce_cardinality groups their rare values like any other text
+        for i, field in enumerate(table.schema):
+            if pa.types.is_temporal(field.type):
+                table = table.set_column(i, field.name, table.column(i).cast(pa.string()))
+        df = table.to_pandas(types_mapper=pd.ArrowDtype)
+
+        missing_cols = [col for col in selected_columns if col not in df.columns]
+        if missing_cols:
+            raise ValueError(f"Columns not found in data: {missing_cols}")
+
+        cache_key = result_cache_key(hashlib.blake2b(raw).hexdigest(), selected_columns, max_order)
+        return submit_task(df[selected_columns], max_order, cache_key)
     except Exception as e:
         logging.error(f"Unhandled error: {str(e)}")
         return jsonify({"status": "error", "message": str(e), "steps_completed": []}), 400
 
-def process_data_task(content, task_id):
+def submit_task(df, max_order, cache_key):
+    global executor
+    task_id = str(uuid.uuid4())
+    # The cap check, the submit and the bookkeeping share one critical section
+    # so concurrent requests can't push past MAX_IN_FLIGHT_TASKS
+    with executor_lock:
+        if len(in_flight_tasks) >= MAX_IN_FLIGHT_TASKS:
+            return jsonify({"status": "error", "message": "Too many tasks in progress, please try again later.", "steps_completed": []}), 429
+
+        with closing(connect_task_db()) as conn:
+            expire_tasks(conn)
+            save_task(task_id, {
+                "progress": 0,
+                "status": "processing",
+                "steps_completed": [],
+                "eta": None,
+                "start_time": time.time()
+            }, conn)
+
+        try:
+            try:
+                task_executor = get_executor()
+                future = task_executor.submit(process_data_task, df, max_order, cache_key, task_id)
+            except BrokenProcessPool:
+                # A worker died since the last task finished, retry on a fresh pool
+                executor = None
+                task_executor = get_executor()
+                future = task_executor.submit(process_data_task, df, max_order, cache_key, task_id)
+        except Exception:
+            # Don't leave a task behind that will never leave "processing"
+            delete_task(task_id)
+            raise
+        in_flight_tasks[future] = (task_id, task_executor)
+    future.add_done_callback(task_done)
+
+    return jsonify({"status": "processing", "task_id": task_id})
+
+def task_done(future):
+    global executor
+    with executor_lock:
+        task_id, task_executor = in_flight_tasks.pop(future)
+        error = None if future.cancelled() else future.exception()
+        if isinstance(error, BrokenProcessPool) and executor is task_executor:
+            # A worker was killed (os._exit, the OOM killer, ...) and took the
+            # pool with it, so the next submit starts a fresh one
+            executor = None
+
+    # process_data_task records its own errors, this catches the task dying
+    if error is not None:
+        logging.error(f"Task {task_id} failed: {str(error)}")
+        task = load_task(task_id) or {}
+        save_task(task_id, {
+            "status": "error",
+            "message": str(error),
+            "steps_completed": task.get("steps_completed", []),
+            "error_logs": []
+        })
+
+def process_data_task(df, max_order, cache_key, task_id):
+    error_logs = []
     try:
-        data = content.get('data')
-        selected_columns = content.get('selected_columns')
-        error_logs = []
+        # Identical submissions reuse the stored result
+        cached_result = load_cached_result(cache_key)
+        if cached_result is not None:
+            logging.info(f"Task {task_id}: Using cached result.")
+            save_task(task_id, cached_result)
+            return
 
         steps = [
             "Preprocessing Data",
@@ -93,8 +392,7 @@ def process_data_task(content, task_id):
             "Multi-Variable Analysis"
         ]
         total_steps = len(steps)
-        progress_data = progress_store[task_id]
-        start_time = progress_data["start_time"]
+        start_time = load_task(task_id)["start_time"]
 
         # Initialize results
         average_cramers_v = None
@@ -105,350 +403,114 @@ def process_data_task(content, task_id):
         multi_variable_results = []
 
         # Step 1: Preprocess Data
-        update_progress(task_id, steps[0], 1, total_steps)
-        df_selected = preprocess_dataframe(pd.DataFrame(data)[selected_columns], error_logs)
-        update_eta(task_id, start_time, total_steps, 1)
+        update_progress(task_id, steps[0], 1, total_steps, start_time)
+        feature_matrix, ordinal_matrix, feature_names, column_slices, feature_codes = preprocess_dataframe(df, error_logs)
+        column_groups = feature_groups(feature_names, column_slices)
 
         # Step 2: Compute Average Cramér's V
-        update_progress(task_id, steps[1], 2, total_steps)
-        average_cramers_v = compute_average_cramers_v(df_selected, error_logs)
-        update_eta(task_id, start_time, total_steps, 2)
+        update_progress(task_id, steps[1], 2, total_steps, start_time)
+        average_cramers_v, pair_stats = compute_average_cramers_v(feature_codes, feature_names, error_logs, n_jobs=1)
 
         # Step 3: Logistic Regression Analysis
-        update_progress(task_id, steps[2], 3, total_steps)
-        logistic_regression_results = logistic_regression_analysis(df_selected, error_logs)
-        update_eta(task_id, start_time, total_steps, 3)
+        update_progress(task_id, steps[2], 3, total_steps, start_time)
+        targets = model_targets(feature_names, column_slices, feature_codes)
+        logistic_regression_results = logistic_regression_analysis(feature_matrix, feature_names, targets, error_logs, n_jobs=1)
 
         # Step 4: Decision Tree Analysis
-        update_progress(task_id, steps[3], 4, total_steps)
-        decision_tree_results = decision_tree_analysis(df_selected, error_logs)
-        update_eta(task_id, start_time, total_steps, 4)
+        update_progress(task_id, steps[3], 4, total_steps, start_time)
+        # Trees split on category codes directly, without the one-hot expansion
+        source_columns, tree_targets = ordinal_targets(column_slices, targets)
+        decision_tree_results = decision_tree_analysis(ordinal_matrix, source_columns, tree_targets, error_logs, n_jobs=1)
 
         # Step 5: Random Forest Analysis
-        update_progress(task_id, steps[4], 5, total_steps)
-        random_forest_results = random_forest_analysis(df_selected, error_logs)
-        update_eta(task_id, start_time, total_steps, 5)
+        update_progress(task_id, steps[4], 5, total_steps, start_time)
+        random_forest_results = random_forest_analysis(ordinal_matrix, source_columns, tree_targets, error_logs, n_jobs=WORKER_N_JOBS)
 
         # Step 6: Chi-Square Tests
-        update_progress(task_id, steps[5], 6, total_steps)
-        chi_square_results = chi_square_tests(df_selected, error_logs)
-        update_eta(task_id, start_time, total_steps, 6)
+        update_progress(task_id, steps[5], 6, total_steps, start_time)
+        chi_square_results = chi_square_tests(feature_codes, feature_names, column_groups, error_logs, pair_stats)
 
         # Step 7: Multi-Variable Analysis
-        update_progress(task_id, steps[6], 7, total_steps)
-        multi_variable_results = multi_variable_analysis(df_selected, error_logs)
-        update_eta(task_id, start_time, total_steps, 7)
+        update_progress(task_id, steps[6], 7, total_steps, start_time)
+        multi_variable_results = multi_variable_analysis(feature_codes, feature_names, column_groups, error_logs, pair_stats, max_order)
 
         # Store the final result
-        with progress_store_lock:
-            progress_store[task_id] = {
-                "status": "success",
-                "progress": 100,
-                "steps_completed": steps,
-                "eta": 0,
-                "average_cramers_v": average_cramers_v,
-                "logistic_regression_results": logistic_regression_results,
-                "decision_tree_results": decision_tree_results,
-                "random_forest_results": random_forest_results,
-                "chi_square_results": chi_square_results,
-                "multi_variable_results": multi_variable_results,
-                "error_logs": error_logs
-            }
+        result = {
+            "status": "success",
+            "progress": 100,
+            "steps_completed": steps,
+            "eta": 0,
+            "average_cramers_v": average_cramers_v,
+            "logistic_regression_results": logistic_regression_results,
+            "decision_tree_results": decision_tree_results,
+            "random_forest_results": random_forest_results,
+            "chi_square_results": chi_square_results,
+            "multi_variable_results": multi_variable_results,
+            "error_logs": error_logs
+        }
+        save_task(task_id, result)
     except Exception as e:
         logging.error(f"Error in processing data task: {str(e)}")
-        with progress_store_lock:
-            progress_store[task_id] = {
-                "status": "error",
-                "message": str(e),
-                "steps_completed": progress_store[task_id].get("steps_completed", []),
-                "error_logs": error_logs
-            }
-
-def update_progress(task_id, step_name, current_step, total_steps):
+        task = load_task(task_id) or {}
+        save_task(task_id, {
+            "status": "error",
+            "message": str(e),
+            "steps_completed": task.get("steps_completed", []),
+            "error_logs": error_logs
+        })
+        return
+
+    # A failed cache write only costs the next identical request a rerun,
+    # the task itself has already succeeded
+    if not error_logs:
+        try:
+            save_cached_result(cache_key, result)
+        except Exception as e:
+            logging.error(f"Task {task_id}: Could not cache result: {str(e)}")
+
+def update_progress(task_id, step_name, current_step, total_steps, start_time):
     progress = (current_step / total_steps) * 100
-    with progress_store_lock:
-        steps_completed = progress_store[task_id].get("steps_completed", [])
-        steps_completed.append(step_name)
-        progress_store[task_id]["progress"] = progress
-        progress_store[task_id]["steps_completed"] = steps_completed
+    with closing(connect_task_db()) as conn:
+        # Progress and ETA of a step are written in a single transaction
+        conn.execute("BEGIN IMMEDIATE")
+        task = load_task(task_id, conn)
+        task["steps_completed"] = task.get("steps_completed", []) + [step_name]
+        task["progress"] = progress
+        if current_step > 1:
+            task["eta"] = estimate_eta(start_time, total_steps, current_step - 1)
+        save_task(task_id, task, conn)
+        conn.execute("COMMIT")
     logging.info(f"Task {task_id}: Completed {step_name} ({progress:.2f}%).")
 
-def update_eta(task_id, start_time, total_steps, current_step):
+def estimate_eta(start_time, total_steps, steps_done):
     elapsed_time = time.time() - start_time
-    avg_time_per_step = elapsed_time / current_step
-    steps_remaining = total_steps - current_step
-    eta = avg_time_per_step * steps_remaining
-    with progress_store_lock:
-        progress_store[task_id]["eta"] = eta
+    avg_time_per_step = elapsed_time / steps_done
+    steps_remaining = total_steps - steps_done
+    return avg_time_per_step * steps_remaining
 
 @app.route('/progress/<task_id>', methods=['GET'])
 def get_progress(task_id):
-    with progress_store_lock:
-        progress = progress_store.get(task_id)
-        if progress is None:
-            return jsonify({"status": "error", "message": "Invalid task ID.", "steps_completed": []}), 404
-        else:
-            if "steps_completed" not in progress or not isinstance(progress["steps_completed"], list):
-                progress["steps_completed"] = []
-            return jsonify(progress)
-
-def preprocess_dataframe(df, error_logs):
-    try:
-        df_processed = df.copy()
-        df_processed = df_processed.fillna(method='ffill').fillna(method='bfill')
-        df_processed = reduce_cardinality(df_processed, error_logs)
-        return pd.get_dummies(df_processed, drop_first=True)
-    except Exception as e:
-        error_logs.append(f"Error processing dataframe: {str(e)}")
-        logging.error(f"Error processing dataframe: {str(e)}")
-        return df
-
-def reduce_cardinality(df, error_logs, threshold=0.05):
-    try:
-        for col in df.columns:
-            if df[col].dtype == 'object':
-                value_counts = df[col].value_counts(normalize=True)
-                to_replace = value_counts[value_counts < threshold].index
-                df[col] = df[col].replace(to_replace, 'Other')
-        return df
-    except Exception as e:
-        error_logs.append(f"Error reducing cardinality: {str(e)}")
-        logging.error(f"Error reducing cardinality: {str(e)}")
-        return df
-
-def compute_average_cramers_v(df, error_logs, max_unique_values=10):
-    try:
-        logging.info("Computing average Cramér's V.")
-        categorical_cols = [col for col in df.columns if df[col].nunique() <= max_unique_values]
-        if len(categorical_cols) < 2:
-            error_logs.append("Not enough variables for correlation analysis after filtering.")
-            return None
-
-        pairs = list(combinations(categorical_cols, 2))
-        total_cramers_v = 0
-        valid_pairs = 0
-
-        for col1, col2 in pairs:
-            crosstab = pd.crosstab(df[col1], df[col2])
-            if crosstab.size == 0:
-                continue
-            chi2, _, _, _ = chi2_contingency(crosstab)
-            n = crosstab.sum().sum()
-            cramers_v = np.sqrt(chi2 / (n * (min(crosstab.shape) - 1)))
-            if not np.isnan(cramers_v):
-                total_cramers_v += cramers_v
-                valid_pairs += 1
-
-        if valid_pairs == 0:
-            error_logs.append("No valid pairs for computing average Cramér's V.")
-            return None
-
-        average_cramers_v = total_cramers_v / valid_pairs
-        interpretation = interpret_cramers_v(average_cramers_v)
-        logging.info(f"Average Cramér's V computed successfully: {average_cramers_v}")
-        return {
-            "value": average_cramers_v,
-            "interpretation": interpretation
-        }
-    except Exception as e:
-        error_logs.append(f"Error computing average Cramér's V: {str(e)}")
-        logging.error(f"Error computing average Cramér's V: {str(e)}")
-        return None
-
-def logistic_regression_analysis(df, error_logs):
-    results = []
-    try:
-        logging.info("Starting logistic regression analysis.")
-        columns = df.columns.tolist()
-
-        for target_col in columns:
-            predictors = [col for col in columns if col != target_col]
-            X = df[predictors]
-            y = df[target_col]
-
-            model = LogisticRegression(max_iter=1000)
-            model.fit(X, y)
-            score = model.score(X, y)
-            interpretation = interpret_model_accuracy(score)
-
-            results.append({
-                "target": target_col,
-                "predictors": predictors,
-                "accuracy": score,
-                "interpretation": interpretation
-            })
-
-        top_results = sorted(results, key=lambda x: x['accuracy'], reverse=True)
-        logging.info("Logistic regression analysis completed.")
-        return top_results
-    except Exception as e:
-        error_logs.append(f"Error during logistic regression analysis: {str(e)}.")
-        logging.error(f"Error during logistic regression analysis: {str(e)}")
-        return []
-
-def decision_tree_analysis(df, error_logs):
-    results = []
-    try:
-        logging.info("Starting decision tree analysis.")
-        columns = df.columns.tolist()
-
-        for target_col in columns:
-            predictors = [col for col in columns if col != target_col]
-            X = df[predictors]
-            y = df[target_col]
-
-            model = DecisionTreeClassifier()
-            model.fit(X, y)
-            score = model.score(X, y)
-            interpretation = interpret_model_accuracy(score)
-
-            results.append({
-                "target": target_col,
-                "predictors": predictors,
-                "accuracy": score,
-                "interpretation": interpretation
-            })
-
-        top_results = sorted(results, key=lambda x: x['accuracy'], reverse=True)
-        logging.info("Decision tree analysis completed.")
-        return top_results
-    except Exception as e:
-        error_logs.append(f"Error during decision tree analysis: {str(e)}.")
-        logging.error(f"Error during decision tree analysis: {str(e)}")
-        return []
-
-def random_forest_analysis(df, error_logs):
-    results = []
-    try:
-        logging.info("Starting random forest analysis.")
-        columns = df.columns.tolist()
-
-        for target_col in columns:
-            predictors = [col for col in columns if col != target_col]
-            X = df[predictors]
-            y = df[target_col]
-
-            model = RandomForestClassifier()
-            model.fit(X, y)
-            score = model.score(X, y)
-            interpretation = interpret_model_accuracy(score)
-
-            results.append({
-                "target": target_col,
-                "predictors": predictors,
-                "accuracy": score,
-                "interpretation": interpretation
-            })
+    response_format = request.args.get('format', 'json')
+    if response_format not in ('json', 'ndjson'):
+        return jsonify({"status": "error", "message": f"Unknown format: {response_format}", "steps_completed": []}), 400
 
-        top_results = sorted(results, key=lambda x: x['accuracy'], reverse=True)
-        logging.info("Random forest analysis completed.")
-        return top_results
-    except Exception as e:
-        error_logs.append(f"Error during random forest analysis: {str(e)}.")
-        logging.error(f"Error during random forest analysis: {str(e)}")
-        return []
-
-def chi_square_tests(df, error_logs):
-    results = []
-    try:
-        logging.info("Performing chi-square tests.")
-        columns = df.columns.tolist()
-        if len(columns) < 2:
-            error_logs.append("Not enough variables for chi-square tests.")
-            return []
-        
-        # Group columns by their prefix (before the underscore)
-        column_groups = {}
-        for col in columns:
-            prefix = col.split('_')[0]
-            if prefix not in column_groups:
-                column_groups[prefix] = []
-            column_groups[prefix].append(col)
-        
-        # Compare columns from different groups
-        for group1, group2 in combinations(column_groups.keys(), 2):
-            for col1 in column_groups[group1]:
-                for col2 in column_groups[group2]:
-                    crosstab = pd.crosstab(df[col1], df[col2])
-                    if crosstab.size == 0:
-                        continue
-                    chi2, p, _, _ = chi2_contingency(crosstab)
-                    n = crosstab.sum().sum()
-                    cramers_v = np.sqrt(chi2 / (n * (min(crosstab.shape) - 1)))
-                    interpretation = interpret_cramers_v(cramers_v)
-                    results.append({
-                        "variable_1": col1,
-                        "variable_2": col2,
-                        "chi2": chi2,
-                        "p_value": p,
-                        "cramers_v": cramers_v,
-                        "interpretation": interpretation
-                    })
-
-        top_results = sorted(results, key=lambda x: x['cramers_v'], reverse=True)
-        logging.info("Chi-square tests completed.")
-        return top_results
-    except Exception as e:
-        error_logs.append(f"Error during chi-square tests: {str(e)}.")
-        logging.error(f"Error during chi-square tests: {str(e)}")
-        return []
-
-def multi_variable_analysis(df, error_logs):
-    results = []
-    try:
-        logging.info("Performing multi-variable analysis.")
-        columns = df.columns.tolist()
-        if len(columns) < 2:
-            error_logs.append("Not enough variables for multi-variable analysis.")
-            return []
-        
-        # Group columns by their prefix (before the underscore)
-        column_groups = {}
-        for col in columns:
-            prefix = col.split('_')[0]
-            if prefix not in column_groups:
-                column_groups[prefix] = []
-            column_groups[prefix].append(col)
-        
-        # Generate all possible combinations of columns from different groups
-        group_combinations = []
-        for r in range(2, len(column_groups) + 1):
-            group_combinations.extend(combinations(column_groups.keys(), r))
-
-        for groups in group_combinations:
-            for columns in product(*[column_groups[group] for group in groups]):
-                # Skip if all columns are from the same group
-                if len(set(col.split('_')[0] for col in columns)) < 2:
-                    continue
-                
-                # Create a frequency table for multiple variables
-                freq_table = df.groupby(list(columns)).size().unstack(fill_value=0)
-                
-                # Perform chi-square test
-                chi2, p, dof, expected = chi2_contingency(freq_table)
-                
-                n = freq_table.sum().sum()
-                min_dim = min(freq_table.shape) - 1
-                if min_dim == 0:
-                    continue
-                
-                cramers_v = np.sqrt(chi2 / (n * min_dim))
-                interpretation = interpret_cramers_v(cramers_v)
-                results.append({
-                    "variables": list(columns),
-                    "chi2": chi2,
-                    "p_value": p,
-                    "cramers_v": cramers_v,
-                    "interpretation": interpretation
-                })
-
-        top_results = sorted(results, key=lambda x: x['cramers_v'], reverse=True)
-        logging.info("Multi-variable analysis completed.")
-        return top_results
-    except Exception as e:
-        error_logs.append(f"Error during multi-variable analysis: {str(e)}.")
-        logging.error(f"Error during multi-variable analysis: {str(e)}")
-        return []
+    progress = load_task(task_id)
+    if progress is None:
+        return jsonify({"status": "error", "message": "Invalid task ID.", "steps_completed": []}), 404
+    else:
+        if "steps_completed" not in progress or not isinstance(progress["steps_completed"], list):
+            progress["steps_completed"] = []
+        if response_format == 'ndjson':
+            return Response(stream_with_context(stream_progress(progress)), mimetype='application/x-ndjson')
+        return Response(dump_json(progress), mimetype='application/json')
+
+def stream_progress(progress):
+    # The task state without its result lists comes first, then one line per
+    # result, so clients can render records before the largest lists are sent
+    yield dump_json({key: value for key, value in progress.items() if key not in RESULT_SECTIONS}) + b"\n"
+    for section in RESULT_SECTIONS:
+        for record in progress.get(section) or []:
+            yield dump_json({"section": section, "result": record}) + b"\n"
 
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
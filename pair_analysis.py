@@ -0,0 +1,328 @@
+import pandas as pd
+import numpy as np
+from scipy.stats import chi2_contingency
+from itertools import combinations
+from joblib import Parallel, delayed
+import logging
+import time
+import sys
+import ast
+
+def analyze_ncea_results(results_str):
+    """Extract and analyze NCEA results from the string representation."""
+    try:
+        results = ast.literal_eval(results_str)
+        if not results or not isinstance(results, list):
+            return None
+        
+        # Calculate average credits and achievement levels
+        total_credits = 0
+        achievement_counts = {
+            'Excellence': 0,
+            'Merit': 0,
+            'Achieved': 0
+        }
+        
+        for result in results:
+            if isinstance(result, dict):
+                total_credits += result.get('Credits', 0)
+                level = result.get('Achievement Level')
+                if level in achievement_counts:
+                    achievement_counts[level] += 1
+        
+        avg_credits = total_credits / len(results) if results else 0
+        primary_achievement = max(achievement_counts.items(), key=lambda x: x[1])[0]
+        
+        return {
+            'average_credits': avg_credits,
+            'primary_achievement': primary_achievement
+        }
+    except:
+        return None
+
+def ncea_achievement_levels(results):
+    """Primary NCEA achievement level of every row, parsing each distinct result once."""
+    try:
+        codes, uniques = pd.factorize(pd.Series(results), use_na_sentinel=False)
+    except TypeError:
+        # Unhashable results can't be deduplicated, analyze them row by row
+        codes, uniques = np.arange(len(results)), list(results)
+    levels = [(analyze_ncea_results(result) or {}).get('primary_achievement', 'Unknown') for result in uniques]
+    return pd.Series(np.array(levels, dtype=object)[codes])
+
+def process_value(x):
+    """Reduce a raw cell (possibly a list or dict literal) to a single category."""
+    if isinstance(x, str):
+        x = x.strip()
+        # Try to parse as list or dict
+        try:
+            x_parsed = ast.literal_eval(x)
+            if isinstance(x_parsed, dict):
+                # For dict, extract first value
+                return next(iter(x_parsed.values()))
+            elif isinstance(x_parsed, list) and x_parsed:
+                # For list, return the first element
+                return str(x_parsed[0])
+            else:
+                return str(x_parsed)
+        except (ValueError, SyntaxError):
+            pass
+        # If cannot parse, return the stripped string
+        return x.strip('[]{}').split(',')[0].strip()
+    else:
+        return str(x)
+
+def normalize_column(series):
+    """Normalize a column's values once, before any pair is analyzed."""
+    if pd.api.types.is_numeric_dtype(series):
+        # map(str) turns missing values into "nan" like process_value, astype(str) keeps them missing
+        return series.map(str)
+    try:
+        codes, uniques = pd.factorize(series)
+    except TypeError:
+        # Unhashable cells (already parsed lists or dicts) can't be deduplicated
+        return series.map(process_value)
+    # Parse each distinct value once, missing values keep their own spelling
+    values = np.array([process_value(x) for x in uniques] + [None], dtype=object)[codes]
+    missing = codes < 0
+    if missing.any():
+        values[missing] = [process_value(x) for x in series[missing]]
+    return pd.Series(values, index=series.index, name=series.name)
+
+def factorize_column(values):
+    """Integer codes of a column and its category labels, sorted as pd.crosstab orders them."""
+    codes, categories = pd.factorize(values, sort=True)
+    return codes, np.array([str(category) for category in categories], dtype=object)
+
+def factorize_raw_column(values, normalized):
+    """Codes of the raw cells, falling back to the normalized ones when the cells are unhashable."""
+    try:
+        return factorize_column(values)
+    except TypeError:
+        return normalized
+
+def crosstab_codes(column1, column2):
+    """Cross-tabulate two factorized columns with a single bincount."""
+    (codes1, categories1), (codes2, categories2) = column1, column2
+    # Rows missing either value are left out, as pd.crosstab does
+    valid = (codes1 >= 0) & (codes2 >= 0)
+    table = np.bincount(
+        codes1[valid] * len(categories2) + codes2[valid],
+        minlength=len(categories1) * len(categories2)
+    ).reshape(len(categories1), len(categories2))
+    rows, cols = table.sum(axis=1) > 0, table.sum(axis=0) > 0
+    return table[rows][:, cols], categories1[rows], categories2[cols]
+
+def analyze_categorical_relationship(contingency, categories1, categories2, col1_name, col2_name):
+    """Analyze the relationship between two categorical variables in detail."""
+    try:
+        chi2, p_value, dof, expected = chi2_contingency(contingency)
+        
+        # Calculate associations for all combinations at once
+        observed = contingency
+        row_totals = observed.sum(axis=1)
+        col_totals = observed.sum(axis=0)
+        expected_vals = np.outer(row_totals, col_totals) / observed.sum()
+        rows, cols = np.nonzero(expected_vals > 0)
+        cell_observed = observed[rows, cols]
+        cell_expected = expected_vals[rows, cols]
+        strength = (cell_observed - cell_expected) / cell_expected * 100
+        
+        # Sort associations by absolute strength, ties keeping table order
+        order = np.argsort(-np.abs(strength), kind='stable')
+        rows, cols = rows[order], cols[order]
+        cell_observed, cell_expected, strength = cell_observed[order], cell_expected[order], strength[order]
+        associations = [
+            {
+                'category1': categories1[row],
+                'category2': categories2[col],
+                'observed': obs,
+                'expected': exp,
+                'strength': strength_val,
+                'row_total': row_total,
+                'col_total': col_total,
+                'row_percentage': row_percentage,
+                'col_percentage': col_percentage
+            }
+            for row, col, obs, exp, strength_val, row_total, col_total, row_percentage, col_percentage in zip(
+                rows.tolist(), cols.tolist(),
+                cell_observed.astype(float).tolist(), cell_expected.tolist(), strength.tolist(),
+                row_totals[rows].astype(float).tolist(), col_totals[cols].astype(float).tolist(),
+                (cell_observed / row_totals[rows] * 100).tolist(),
+                (cell_observed / col_totals[cols] * 100).tolist()
+            )
+        ]
+        
+        # Add category summaries
+        category_summaries = {
+            'primary': dict(zip(categories1, row_totals.astype(int).tolist())),
+            'secondary': dict(zip(categories2, col_totals.astype(int).tolist()))
+        }
+        
+        return {
+            'chi2': float(chi2),
+            'p_value': float(p_value),
+            'dof': int(dof),
+            'associations': associations,
+            'total_observations': int(contingency.sum()),
+            'category_summaries': category_summaries
+        }
+        
+    except Exception as e:
+        print(f"Error in analyze_categorical_relationship: {str(e)}")
+        return None
+
+def calculate_cramers_v_with_details(column1, column2, col1_name, col2_name):
+    """Calculate Cramér's V statistic and detailed categorical analysis."""
+    try:
+        # Each column holds its normalized codes for the breakdown and the
+        # codes of its raw cells, which Cramér's V is computed on
+        (column1, raw1), (column2, raw2) = column1, column2
+        # Special handling for NCEA Results
+        if col1_name == 'NCEA Results' or col2_name == 'NCEA Results':
+            ncea_col = column1 if col1_name == 'NCEA Results' else column2
+            other_col = column2 if col1_name == 'NCEA Results' else column1
+            
+            # NCEA results arrive already reduced to their achievement levels
+            contingency, categories1, categories2 = crosstab_codes(ncea_col, other_col)
+            detailed_analysis = analyze_categorical_relationship(
+                contingency,
+                categories1,
+                categories2,
+                'NCEA Achievement Level',
+                col2_name if col1_name == 'NCEA Results' else col1_name
+            )
+        else:
+            contingency, categories1, categories2 = crosstab_codes(column1, column2)
+            detailed_analysis = analyze_categorical_relationship(contingency, categories1, categories2, col1_name, col2_name)
+        
+        # Calculate Cramér's V
+        if raw1 is not column1 or raw2 is not column2:
+            contingency = crosstab_codes(raw1, raw2)[0]
+        n = contingency.sum()
+        min_dim = min(contingency.shape) - 1
+        
+        if min_dim <= 0:
+            return 0, None
+        
+        # Uncorrected chi-square straight from the counts, the same sum
+        # chi2_contingency(correction=False) evaluates without its overhead
+        expected = np.outer(contingency.sum(axis=1), contingency.sum(axis=0)) / n
+        chi2 = ((contingency - expected) ** 2 / expected).sum()
+            
+        cramer_v = np.sqrt(chi2 / (n * min_dim))
+        
+        return float(cramer_v), detailed_analysis  # Ensure cramer_v is a float
+        
+    except Exception as e:
+        print(f"Error in calculate_cramers_v_with_details: {str(e)}")
+        return 0, None
+
+def process_pair(data_dict, col1, col2):
+    """Process a single pair of columns with detailed analysis."""
+    try:
+        cramer_v, details = calculate_cramers_v_with_details(data_dict[col1], data_dict[col2], col1, col2)
+        
+        return {
+            'col1': col1,
+            'col2': col2,
+            'value': cramer_v,  # Ensure cramer_v is a float
+            'details': details
+        }
+    except Exception as e:
+        print(f"Error processing pair {col1}, {col2}: {str(e)}")
+        return {
+            'col1': col1,
+            'col2': col2,
+            'value': 0,
+            'details': None
+        }
+
+def process_batches_with_eta(df, selected_columns, batch_size=20):
+    try:
+        if len(selected_columns) < 2:
+            raise ValueError("Please select at least two columns for analysis")
+
+        column_pairs = list(combinations(selected_columns, 2))
+        total_pairs = len(column_pairs)
+        
+        # Convert DataFrame to dictionary for pickling, normalizing and
+        # factorizing every column once here rather than for each pair it
+        # appears in. NCEA Results are parsed into achievement levels instead,
+        # which Cramér's V uses as well.
+        data_dict = {}
+        for col in selected_columns:
+            if col == 'NCEA Results':
+                levels = factorize_column(ncea_achievement_levels(df[col].values))
+                data_dict[col] = (levels, levels)
+            else:
+                normalized = factorize_column(normalize_column(df[col]))
+                data_dict[col] = (normalized, factorize_raw_column(df[col].values, normalized))
+        
+        # Process in batches
+        results = []
+        start_time = time.time()
+        
+        # The pairs only read the shared integer codes, so threads work on
+        # them directly instead of pickling data_dict to worker processes.
+        # One pool serves every batch.
+        with Parallel(n_jobs=-1, backend='threading') as parallel:
+            for i in range(0, total_pairs, batch_size):
+                batch_pairs = column_pairs[i:i + batch_size]
+                
+                # Process batch in parallel
+                batch_results = parallel(
+                    delayed(process_pair)(data_dict, col1, col2) 
+                    for col1, col2 in batch_pairs
+                )
+                
+                results.extend(batch_results)
+                
+                # Calculate and display ETA
+                elapsed_time = time.time() - start_time
+                processed_pairs = min(i + batch_size, total_pairs)
+                remaining_pairs = total_pairs - processed_pairs
+                eta_seconds = (elapsed_time / processed_pairs) * remaining_pairs if processed_pairs > 0 else 0
+                
+                sys.stdout.write(f"\rETA: {format_eta(eta_seconds)}")
+                sys.stdout.flush()
+
+        sys.stdout.write('\n')
+        
+        # Calculate final results
+        valid_results = [r['value'] for r in results if r['value'] is not None and not np.isnan(r['value'])]
+        average_cramers_v = sum(valid_results) / len(valid_results) if valid_results else 0
+        
+        # Convert all data to serializable types
+        results_serializable = [convert_to_serializable(r) for r in results]
+        
+        return {
+            "average_cramers_v": float(average_cramers_v),
+            "valid_pairs": len(valid_results),
+            "pairs": results_serializable
+        }
+
+    except Exception as e:
+        logging.error(f"Error in batch processing: {str(e)}")
+        raise
+
+def format_eta(seconds):
+    """Format ETA in hours, minutes, and seconds."""
+    hours, remainder = divmod(int(seconds), 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{hours}h {minutes}m {seconds}s"
+
+def convert_to_serializable(obj):
+    """Recursively convert NumPy data types to native Python types."""
+    if isinstance(obj, dict):
+        return {k: convert_to_serializable(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [convert_to_serializable(v) for v in obj]
+    elif isinstance(obj, np.integer):
+        return int(obj)
+    elif isinstance(obj, np.floating):
+        return float(obj)
+    elif isinstance(obj, np.ndarray):
+        return obj.tolist()
+    else:
+        return obj
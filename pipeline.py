@@ -0,0 +1,496 @@
+import pandas as pd
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.ensemble import RandomForestClassifier
+from scipy import sparse
+from scipy.stats import chi2 as chi2_distribution
+from itertools import combinations, product
+from joblib import Parallel, delayed
+import logging
+import math
+
+# Columns of up to MAX_MATRIX_LEVELS levels share one level co-occurrence
+# matrix in pairwise_statistics, 2048 levels in total keep it at 32 MB
+MAX_MATRIX_LEVELS = 100
+MAX_MATRIX_TOTAL_LEVELS = 2048
+
+def interpret_cramers_v(v):
+    if v < 0.1:
+        return "Very weak"
+    elif v < 0.3:
+        return "Weak"
+    elif v < 0.5:
+        return "Moderate"
+    elif v < 0.7:
+        return "Strong"
+    else:
+        return "Very strong"
+
+def interpret_model_accuracy(accuracy):
+    if accuracy < 0.6:
+        return "Poor"
+    elif accuracy < 0.7:
+        return "Fair"
+    elif accuracy < 0.8:
+        return "Good"
+    elif accuracy < 0.9:
+        return "Very good"
+    else:
+        return "Excellent"
+
+def preprocess_dataframe(df, error_logs):
+    try:
+        # Only the columns with gaps are filled, complete ones are not copied
+        missing = df.columns[df.isna().any().to_numpy()]
+        df_processed = df.assign(**df[missing].ffill().bfill())
+        df_processed = reduce_cardinality(df_processed, error_logs)
+        return encode_features(df_processed)
+    except Exception as e:
+        error_logs.append(f"Error processing dataframe: {str(e)}")
+        logging.error(f"Error processing dataframe: {str(e)}")
+        raise
+
+def encode_features(df):
+    # Numeric columns are kept as is and the remaining ones are one-hot
+    # encoded (dropping the first category), as pd.get_dummies would, but
+    # into a sparse matrix. Every feature's codes are kept alongside, as
+    # (codes, levels, level): a one-hot feature shares its input column's
+    # codes and stands for the rows at its level, see level_codes.
+    # The tree models get a dense matrix of one column per input column
+    # instead, with the categorical columns as their category codes
+    numeric_cols = [col for col in df.columns if pd.api.types.is_numeric_dtype(df[col])]
+    categorical_cols = [col for col in df.columns if col not in numeric_cols]
+
+    # Column-major, so each target's predictor columns are copied as
+    # contiguous blocks and the trees scan every feature sequentially
+    ordinal_matrix = np.empty((len(df), len(df.columns)), dtype=np.float32, order='F')
+    ordinal_matrix[:, :len(numeric_cols)] = df[numeric_cols].to_numpy(dtype=np.float32)
+    blocks = [sparse.csr_matrix(ordinal_matrix[:, :len(numeric_cols)])]
+    feature_names = list(numeric_cols)
+    column_slices = {col: slice(i, i + 1) for i, col in enumerate(numeric_cols)}
+    codes = factorize_columns(df, numeric_cols)
+
+    # Nonzero entries of the whole one-hot block, assembled into one matrix
+    one_hot_rows, one_hot_cols = [], []
+    for i, col in enumerate(categorical_cols, start=len(numeric_cols)):
+        # Sorted category codes, the first category being the dropped one.
+        # Columns reduce_cardinality left categorical already have them
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            col_codes, categories = df[col].cat.codes.to_numpy(), df[col].cat.categories.astype(str)
+        else:
+            col_codes, categories = pd.factorize(df[col].astype(str), sort=True)
+        col_codes = col_codes.astype(np.min_scalar_type(-len(categories) - 1))
+        ordinal_matrix[:, i] = col_codes
+        rows = np.flatnonzero(col_codes > 0)
+        start = len(feature_names)
+        one_hot_rows.append(rows)
+        # Widened first, the column offsets outgrow the compact code type
+        one_hot_cols.append(col_codes[rows].astype(np.intp) + (start - len(numeric_cols) - 1))
+
+        for level, category in enumerate(categories[1:], start=1):
+            feature = f"{col}_{category}"
+            feature_names.append(feature)
+            codes[feature] = (col_codes, 2, level)
+        column_slices[col] = slice(start, len(feature_names))
+
+    if categorical_cols:
+        rows = np.concatenate(one_hot_rows)
+        blocks.append(sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, np.concatenate(one_hot_cols))),
+            shape=(len(df), len(feature_names) - len(numeric_cols))
+        ))
+
+    return sparse.hstack(blocks, format='csr'), ordinal_matrix, np.array(feature_names, dtype=object), column_slices, codes
+
+def reduce_cardinality(df, error_logs, threshold=0.05):
+    try:
+        reduced = {}
+        for col in df.columns:
+            values = df[col]
+            if pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values):
+                value_counts = values.value_counts(normalize=True)
+                keep = value_counts.index[value_counts >= threshold]
+                rare = ~values.isin(keep)
+                if rare.any():
+                    values = values.mask(rare, 'Other')
+                reduced[col] = values.astype('category')
+        # Swap all reduced columns in at once instead of one setitem per column
+        return df.assign(**reduced)
+    except Exception as e:
+        error_logs.append(f"Error reducing cardinality: {str(e)}")
+        logging.error(f"Error reducing cardinality: {str(e)}")
+        return df
+
+def factorize_columns(df, columns):
+    codes = {}
+    for col in columns:
+        col_codes, uniques = pd.factorize(df[col])
+        codes[col] = (col_codes.astype(np.min_scalar_type(-len(uniques) - 1)), len(uniques), None)
+    return codes
+
+def level_codes(codes, feature, rows=slice(None)):
+    # The codes of a feature over the given rows, one-hot features being
+    # derived from their input column's codes as the indicator of their level
+    col_codes, k, level = codes[feature]
+    col_codes = col_codes[rows]
+    return col_codes if level is None else (col_codes == level).view(np.int8)
+
+def contingency_table(codes, columns):
+    # Linearize the codes of all columns into one bincount, rows are the
+    # combinations of all but the last column and columns the last one
+    col_codes = [level_codes(codes, col) for col in columns]
+    ks = [codes[col][1] for col in columns]
+    valid = np.logical_and.reduce([c >= 0 for c in col_codes])
+    if not valid.all():
+        # Drop rows with missing values, as pd.crosstab does
+        col_codes = [c[valid] for c in col_codes]
+
+    flat = np.zeros(len(col_codes[0]), dtype=np.int64)
+    for c, k in zip(col_codes, ks):
+        flat = flat * k + c
+
+    n_rows, n_cols = int(np.prod(ks[:-1])), ks[-1]
+    if n_rows * n_cols > len(flat):
+        # Sparse table, only keep the row combinations that occur
+        rows, flat_rows = np.unique(flat // n_cols, return_inverse=True)
+        flat = flat_rows * n_cols + flat % n_cols
+        n_rows = len(rows)
+    observed = np.bincount(flat, minlength=n_rows * n_cols).reshape(n_rows, n_cols).astype(np.float64)
+    return observed[observed.sum(axis=1) > 0][:, observed.sum(axis=0) > 0]
+
+def chi2_cramers_v(observed):
+    n = observed.sum()
+    min_dim = min(observed.shape) - 1
+    if n == 0 or min_dim == 0:
+        return 0.0, np.nan
+    expected = np.outer(observed.sum(axis=1), observed.sum(axis=0)) / n
+    chi2 = ((observed - expected) ** 2 / expected).sum()
+    return chi2, np.sqrt(chi2 / (n * min_dim))
+
+def pair_statistics(codes, col1, col2):
+    observed = contingency_table(codes, (col1, col2))
+    if observed.size == 0:
+        return None
+    chi2, cramers_v = chi2_cramers_v(observed)
+    dof = (observed.shape[0] - 1) * (observed.shape[1] - 1)
+    p = chi2_distribution.sf(chi2, dof) if dof > 0 else 1.0
+    return chi2, p, cramers_v
+
+def pairwise_statistics(codes, columns, chunk_size=4096, n_jobs=-1):
+    # Every pairwise contingency table is a block of the level co-occurrence
+    # matrix Z.T @ Z of the one-hot level indicators Z. Since
+    # chi2 = N * sum(O ** 2 / (row_total * col_total)) - N, summing the
+    # scaled squared counts per block gives the chi-square of all pairs at once
+    pair_stats = {}
+    matrix_cols = []
+    total_levels = 0
+    for col in columns:
+        k = codes[col][1]
+        if 2 <= k <= MAX_MATRIX_LEVELS and total_levels + k <= MAX_MATRIX_TOTAL_LEVELS and (level_codes(codes, col) >= 0).all():
+            matrix_cols.append(col)
+            total_levels += k
+
+    if len(matrix_cols) >= 2:
+        ks = np.array([codes[col][1] for col in matrix_cols])
+        offsets = np.concatenate(([0], np.cumsum(ks)[:-1]))
+        n = len(codes[matrix_cols[0]][0])
+
+        # Accumulate Z.T @ Z over row chunks with dense float32 GEMMs, chunk
+        # counts stay well inside float32's exact integer range. The level
+        # indices are built per chunk, never for all rows at once
+        co_counts = np.zeros((total_levels, total_levels))
+        rows = np.arange(chunk_size)[:, None]
+        for start in range(0, n, chunk_size):
+            chunk_rows = slice(start, start + chunk_size)
+            chunk = np.column_stack([level_codes(codes, col, chunk_rows) for col in matrix_cols]) + offsets
+            indicators = np.zeros((len(chunk), total_levels), dtype=np.float32)
+            indicators[rows[:len(chunk)], chunk] = 1
+            co_counts += indicators.T @ indicators
+        level_counts = np.diag(co_counts).copy()
+
+        # The level matrix is the step's largest allocation, so the
+        # O ** 2 / (row_total * col_total) terms overwrite it in place
+        terms = np.square(co_counts, out=co_counts)
+        terms /= level_counts[:, None]
+        terms /= level_counts[None, :]
+        block_sums = np.add.reduceat(np.add.reduceat(terms, offsets, axis=0), offsets, axis=1)
+
+        # Only the upper triangle holds distinct pairs, the p-values and
+        # Cramér's V are computed for those alone
+        i, j = np.triu_indices(len(matrix_cols), 1)
+        chi2 = np.maximum(n * block_sums[i, j] - n, 0)
+        p = chi2_distribution.sf(chi2, (ks[i] - 1) * (ks[j] - 1))
+        cramers_v = np.sqrt(chi2 / (n * (np.minimum(ks[i], ks[j]) - 1)))
+        for a, b, stats in zip(i, j, zip(chi2, p, cramers_v)):
+            pair_stats[frozenset((matrix_cols[a], matrix_cols[b]))] = stats
+
+    # Columns with missing values, a single level or too many levels go
+    # through the per-pair contingency tables instead. The pairs are
+    # independent, so they are spread over worker processes like the models
+    matrix_set = set(matrix_cols)
+    fallback_pairs = {}
+    for col1 in columns:
+        if col1 in matrix_set:
+            continue
+        for col2 in columns:
+            key = frozenset((col1, col2))
+            if col2 != col1 and key not in pair_stats and key not in fallback_pairs:
+                fallback_pairs[key] = (col1, col2)
+    if fallback_pairs:
+        fallback_stats = Parallel(n_jobs=n_jobs, backend='loky')(
+            delayed(pair_statistics)({col1: codes[col1], col2: codes[col2]}, col1, col2)
+            for col1, col2 in fallback_pairs.values()
+        )
+        pair_stats.update(zip(fallback_pairs, fallback_stats))
+    return pair_stats
+
+def compute_average_cramers_v(codes, columns, error_logs, max_unique_values=10, n_jobs=-1):
+    pair_stats = {}
+    try:
+        logging.info("Computing average Cramér's V.")
+        pair_stats = pairwise_statistics(codes, columns, n_jobs=n_jobs)
+        categorical_cols = [col for col in columns if codes[col][1] <= max_unique_values]
+        if len(categorical_cols) < 2:
+            error_logs.append("Not enough variables for correlation analysis after filtering.")
+            return None, pair_stats
+
+        cramers_v = np.array([
+            stats[2] for stats in (pair_stats[frozenset(pair)] for pair in combinations(categorical_cols, 2))
+            if stats is not None
+        ])
+        cramers_v = cramers_v[~np.isnan(cramers_v)]
+
+        if cramers_v.size == 0:
+            error_logs.append("No valid pairs for computing average Cramér's V.")
+            return None, pair_stats
+
+        average_cramers_v = cramers_v.mean()
+        interpretation = interpret_cramers_v(average_cramers_v)
+        logging.info(f"Average Cramér's V computed successfully: {average_cramers_v}")
+        return {
+            "value": average_cramers_v,
+            "interpretation": interpretation
+        }, pair_stats
+    except Exception as e:
+        error_logs.append(f"Error computing average Cramér's V: {str(e)}")
+        logging.error(f"Error computing average Cramér's V: {str(e)}")
+        return None, pair_stats
+
+def feature_groups(columns, column_slices):
+    # Features grouped by the input column they were encoded from, so that
+    # one-hot siblings are never tested against each other
+    return {col: columns[feature_slice].tolist() for col, feature_slice in column_slices.items()
+            if feature_slice.stop > feature_slice.start}
+
+def model_targets(columns, column_slices, codes):
+    # One target per input column, predicted only from the features of the
+    # other columns so that one-hot siblings can't leak the answer
+    targets = []
+    for col, feature_slice in column_slices.items():
+        features = columns[feature_slice]
+        if len(features) == 0:
+            continue
+        mask = np.ones(len(columns), dtype=bool)
+        mask[feature_slice] = False
+        if len(features) == 1:
+            y, n_classes = level_codes(codes, features[0]), codes[features[0]][1]
+        else:
+            # The one-hot features share their column's category codes, 0
+            # being the dropped category, already in the smallest integer type
+            y, n_classes = codes[features[0]][0], len(features) + 1
+        targets.append((col, mask, y, n_classes))
+    return targets
+
+def ordinal_targets(column_slices, targets):
+    # The same targets over the ordinal matrix, whose columns follow column_slices
+    columns = np.array(list(column_slices), dtype=object)
+    return columns, [(col, columns != col, y, n_classes) for col, mask, y, n_classes in targets]
+
+def fit_target_model(model, feature_matrix, columns, target, mask, y):
+    X = feature_matrix[:, mask]
+
+    model.fit(X, y)
+    score = model.score(X, y)
+    return {
+        "target": target,
+        "predictors": columns[mask].tolist(),
+        "accuracy": score,
+        "interpretation": interpret_model_accuracy(score)
+    }
+
+def fit_target_models(make_model, feature_matrix, columns, targets, n_jobs=-1):
+    results = Parallel(n_jobs=n_jobs, backend='loky')(
+        delayed(fit_target_model)(make_model(n_classes), feature_matrix, columns, target, mask, y)
+        for target, mask, y, n_classes in targets if n_classes >= 2
+    )
+    # Constant targets have nothing to predict
+    results.extend(
+        {"target": target, "predictors": columns[mask].tolist(), "accuracy": None, "interpretation": None}
+        for target, mask, y, n_classes in targets if n_classes < 2
+    )
+    return sorted(results, key=lambda x: -1 if x['accuracy'] is None else x['accuracy'], reverse=True)
+
+def logistic_regression_model(n_classes):
+    if n_classes == 2:
+        return LogisticRegression(solver='liblinear', C=1.0, max_iter=200)
+    return LogisticRegression(solver='saga', max_iter=300, tol=1e-3)
+
+def logistic_regression_analysis(feature_matrix, columns, targets, error_logs, n_jobs=-1):
+    try:
+        logging.info("Starting logistic regression analysis.")
+        top_results = fit_target_models(logistic_regression_model, feature_matrix, columns, targets, n_jobs=n_jobs)
+        logging.info("Logistic regression analysis completed.")
+        return top_results
+    except Exception as e:
+        error_logs.append(f"Error during logistic regression analysis: {str(e)}.")
+        logging.error(f"Error during logistic regression analysis: {str(e)}")
+        return []
+
+def decision_tree_analysis(feature_matrix, columns, targets, error_logs, n_jobs=-1):
+    try:
+        logging.info("Starting decision tree analysis.")
+        # Bounded depth and leaf size keep each fit's cost predictable on wide inputs
+        min_samples_leaf = max(20, feature_matrix.shape[0] // 100)
+        top_results = fit_target_models(
+            lambda n_classes: DecisionTreeClassifier(max_depth=8, min_samples_leaf=min_samples_leaf, random_state=0),
+            feature_matrix, columns, targets, n_jobs=n_jobs
+        )
+        logging.info("Decision tree analysis completed.")
+        return top_results
+    except Exception as e:
+        error_logs.append(f"Error during decision tree analysis: {str(e)}.")
+        logging.error(f"Error during decision tree analysis: {str(e)}")
+        return []
+
+def random_forest_analysis(feature_matrix, columns, targets, error_logs, n_jobs=-1):
+    try:
+        logging.info("Starting random forest analysis.")
+        # The targets are fitted one after another and each forest builds its
+        # trees on n_jobs threads, so no worker processes are started
+        top_results = fit_target_models(
+            # Each tree bootstraps half the rows, which is plenty for a screening score
+            lambda n_classes: RandomForestClassifier(
+                n_estimators=50, max_depth=10, min_samples_leaf=20, max_samples=0.5, n_jobs=n_jobs, random_state=0
+            ),
+            feature_matrix, columns, targets,
+            n_jobs=1
+        )
+        logging.info("Random forest analysis completed.")
+        return top_results
+    except Exception as e:
+        error_logs.append(f"Error during random forest analysis: {str(e)}.")
+        logging.error(f"Error during random forest analysis: {str(e)}")
+        return []
+
+def chi_square_tests(codes, columns, column_groups, error_logs, pair_stats=None):
+    results = []
+    try:
+        logging.info("Performing chi-square tests.")
+        if len(columns) < 2:
+            error_logs.append("Not enough variables for chi-square tests.")
+            return []
+        if pair_stats is None:
+            pair_stats = {}
+        
+        # Compare columns from different groups
+        for group1, group2 in combinations(column_groups.keys(), 2):
+            for col1 in column_groups[group1]:
+                for col2 in column_groups[group2]:
+                    key = frozenset((col1, col2))
+                    if key not in pair_stats:
+                        # Pair was not eligible for the average Cramér's V, compute it now
+                        pair_stats[key] = pair_statistics(codes, col1, col2)
+                    stats = pair_stats[key]
+                    if stats is None:
+                        continue
+                    chi2, p, cramers_v = stats
+                    interpretation = interpret_cramers_v(cramers_v)
+                    results.append({
+                        "variable_1": col1,
+                        "variable_2": col2,
+                        "chi2": chi2,
+                        "p_value": p,
+                        "cramers_v": cramers_v,
+                        "interpretation": interpretation
+                    })
+
+        top_results = sorted(results, key=lambda x: x['cramers_v'], reverse=True)
+        logging.info("Chi-square tests completed.")
+        return top_results
+    except Exception as e:
+        error_logs.append(f"Error during chi-square tests: {str(e)}.")
+        logging.error(f"Error during chi-square tests: {str(e)}")
+        return []
+
+def multi_variable_analysis(codes, columns, column_groups, error_logs, pair_stats=None, max_order=3, min_expected_count=5, min_pair_cramers_v=0.05):
+    results = []
+    try:
+        logging.info("Performing multi-variable analysis.")
+        if len(columns) < 2:
+            error_logs.append("Not enough variables for multi-variable analysis.")
+            return []
+        n_rows = len(codes[columns[0]][0])
+        levels = {col: codes[col][1] for col in columns}
+        # Results still waiting for a p-value, with their degrees of freedom
+        pending = []
+        pending_dofs = []
+        # Generate all possible combinations of columns from different groups
+        group_combinations = []
+        for r in range(2, min(len(column_groups), max_order) + 1):
+            group_combinations.extend(combinations(column_groups.keys(), r))
+
+        for groups in group_combinations:
+            # Each group contributes one column, so every combination spans several groups
+            for columns in product(*[column_groups[group] for group in groups]):
+                # Skip tables too sparse for the chi-square approximation
+                if n_rows / math.prod(levels[col] for col in columns) < min_expected_count:
+                    continue
+
+                # Skip combinations whose variables are all pairwise unrelated
+                if pair_stats:
+                    pair_cramers_v = [pair_stats.get(frozenset(pair)) for pair in combinations(columns, 2)]
+                    if all(stats is not None and stats[2] < min_pair_cramers_v for stats in pair_cramers_v):
+                        continue
+                
+                if len(columns) == 2 and pair_stats and frozenset(columns) in pair_stats:
+                    # Pairs were already tested together in pairwise_statistics
+                    stats = pair_stats[frozenset(columns)]
+                    if stats is None or np.isnan(stats[2]):
+                        continue
+                    chi2, p, cramers_v = stats
+                else:
+                    # Create a frequency table for multiple variables
+                    freq_table = contingency_table(codes, columns)
+                    if freq_table.size == 0:
+                        continue
+
+                    chi2, cramers_v = chi2_cramers_v(freq_table)
+                    if np.isnan(cramers_v):
+                        continue
+                    p = None
+                    pending_dofs.append((freq_table.shape[0] - 1) * (freq_table.shape[1] - 1))
+                interpretation = interpret_cramers_v(cramers_v)
+                results.append({
+                    "variables": list(columns),
+                    "chi2": chi2,
+                    "p_value": p,
+                    "cramers_v": cramers_v,
+                    "interpretation": interpretation
+                })
+                if p is None:
+                    pending.append(results[-1])
+
+        # One vectorized survival function call instead of one per table
+        if pending:
+            p_values = chi2_distribution.sf([result["chi2"] for result in pending], pending_dofs)
+            for result, p in zip(pending, p_values):
+                result["p_value"] = p
+
+        top_results = sorted(results, key=lambda x: x['cramers_v'], reverse=True)
+        logging.info("Multi-variable analysis completed.")
+        return top_results
+    except Exception as e:
+        error_logs.append(f"Error during multi-variable analysis: {str(e)}.")
+        logging.error(f"Error during multi-variable analysis: {str(e)}")
+        return []
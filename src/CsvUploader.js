@@ -129,7 +129,7 @@ const CsvUploader = () => {
 
     try {
         const response = await axios.post(
-            "https://school-ai-backend.onrender.com/process",
+            "https://school-ai-backend.onrender.com/process?mode=quick",
             {
                 data: csvData,
                 selected_columns: selectedColumns,
@@ -0,0 +1,82 @@
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+from scipy.stats import chi2_contingency
+
+from pipeline import MAX_MATRIX_LEVELS, contingency_table, encode_features, pairwise_statistics
+
+
+def make_frame(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    score = rng.integers(0, 5, n).astype(float)
+    score[::9] = np.nan
+    return pd.DataFrame({
+        "Score": score,
+        "Credits": rng.integers(0, 3, n),
+        "Gender": rng.choice(["M", "F"], n),
+        "Subject": rng.choice(["Math", "Sci", "Eng", "Art"], n),
+        "YearLevel": pd.Categorical(rng.choice(["Y9", "Y10", "Y11"], n)),
+        # More levels than the co-occurrence matrix takes, so it goes per pair
+        "Student": rng.integers(0, MAX_MATRIX_LEVELS * 2, n),
+    })
+
+
+def reference_statistics(x, y):
+    observed = pd.crosstab(x, y)
+    chi2, p, _, _ = chi2_contingency(observed, correction=False)
+    n = observed.to_numpy().sum()
+    return chi2, p, np.sqrt(chi2 / (n * (min(observed.shape) - 1)))
+
+
+def test_encode_features_matches_get_dummies():
+    df = make_frame()
+    feature_matrix, ordinal_matrix, feature_names, column_slices, codes = encode_features(df)
+    expected = pd.get_dummies(df, drop_first=True, dtype=np.float32)
+
+    assert list(feature_names) == list(expected.columns)
+    np.testing.assert_array_equal(feature_matrix.toarray(), expected.to_numpy())
+    assert set(column_slices) == set(df.columns)
+    for col, feature_slice in column_slices.items():
+        assert [feature.split("_")[0] for feature in feature_names[feature_slice]] == [col] * (feature_slice.stop - feature_slice.start)
+
+
+def test_encode_features_offsets_past_the_code_type():
+    # Small columns after a wide one have int8 codes but one-hot offsets past 127
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({
+        "Teacher": [f"T{i:03d}" for i in rng.integers(0, 150, 3000)],
+        "House": rng.choice(["Red", "Blue", "Green"], 3000),
+    })
+    feature_matrix, _, feature_names, _, _ = encode_features(df)
+    expected = pd.get_dummies(df, drop_first=True, dtype=np.float32)
+
+    assert list(feature_names) == list(expected.columns)
+    np.testing.assert_array_equal(feature_matrix.toarray(), expected.to_numpy())
+
+
+def test_contingency_table_matches_crosstab():
+    df = make_frame()
+    # Sorted codes, so that the table's rows and columns follow pd.crosstab's order
+    codes = {}
+    for col in df.columns:
+        col_codes, uniques = pd.factorize(df[col], sort=True)
+        codes[col] = (col_codes, len(uniques), None)
+    for columns in (("Score", "Subject"), ("Gender", "Subject", "YearLevel"), ("Student", "Credits")):
+        expected = pd.crosstab([df[col] for col in columns[:-1]], df[columns[-1]])
+        np.testing.assert_array_equal(contingency_table(codes, columns), expected.to_numpy())
+
+
+def test_pairwise_statistics_matches_chi2_contingency():
+    df = make_frame()
+    _, _, feature_names, _, codes = encode_features(df)
+    dummies = pd.get_dummies(df, drop_first=True)
+    pair_stats = pairwise_statistics(codes, feature_names, n_jobs=1)
+
+    assert set(pair_stats) == {frozenset(pair) for pair in combinations(feature_names, 2)}
+    for col1, col2 in combinations(feature_names, 2):
+        np.testing.assert_allclose(
+            pair_stats[frozenset((col1, col2))],
+            reference_statistics(dummies[col1], dummies[col2]),
+            rtol=1e-10, atol=1e-12
+        )